@@ -2,8 +2,8 @@ import pandas as pd
 import re
 import json
 import os
-import jieba
-import jieba.analyse
+from News_dedup import SimHashIndex, make_doc_id
+from News_keywords import KeywordModel
 
 INPUT_FILE = "ettoday_raw_data.csv"
 OUTPUT_JSON = "cleaned_news.json"
@@ -40,22 +40,17 @@ REPORTER_BLACKLIST = {
 }
 
 
-def extract_keywords_from_text(text):
-    if not text or pd.isna(text):
-        return []
-    
-    raw_keywords = jieba.analyse.extract_tags(text, topK=50)
-    
-    filtered_keywords = []
-    for w in raw_keywords:
-        # --- 過濾邏輯 ---
-        # 1. 必須不在黑名單
-        # 2. 長度 > 1 (過濾單字)
-        # 3. 不能是純數字 (新增功能，過濾 "20", "10")
-        if w not in STOP_WORDS and len(w) > 1 and not w.isdigit():
-            filtered_keywords.append(w)
-    
-    return filtered_keywords[:5] # 最後只取前 5 個
+def extract_keywords(df):
+    """
+    用我們自己新聞庫的 IDF (keyword_df.json.gz) 對「標題 + 內文」算 TF-IDF。
+    文件頻率表由每日歸檔 (update_csv.py) 負責寫回，這裡只把本批文章加進記憶體中的統計。
+    """
+    keyword_model = KeywordModel.load(stop_words=STOP_WORDS)
+    print(f"   📚 已載入詞頻表 (累積 {len(keyword_model)} 篇文章)")
+
+    docs = keyword_model.tokenize_batch(df['title'], df['content'])
+    keyword_model.update(docs)
+    return keyword_model.extract_batch(docs)
 
 def extract_reporter(content):
     if pd.isna(content): 
@@ -106,16 +101,24 @@ def clean_data():
     
     df['reporter'] = df['content'].apply(extract_reporter)
 
-    print("🔍 正在從「標題」提取關鍵詞...")
+    print("🔍 正在從「標題 + 內文」提取關鍵詞 (語料庫 TF-IDF)...")
     
-    df['keywords'] = df['title'].apply(extract_keywords_from_text)
+    df['keywords'] = extract_keywords(df)
+
+    print("🧬 正在比對近似重複新聞 (SimHash)...")
+    # 索引由每日歸檔 (update_csv.py) 負責寫回，這裡只讀取 + 比對本批資料
+    dedup_index = SimHashIndex.load()
+    df['cluster_id'] = dedup_index.assign_dataframe(df)
+    dup_count = (df['cluster_id'] != df['link'].map(make_doc_id)).sum()
+    print(f"   🔁 本批共有 {dup_count} 篇被判定為重複新聞 (已標記 cluster_id)")
     
-    final_df = df[['title', 'content', 'date_str', 'category', 'reporter', 'link', 'keywords']]
+    final_df = df[['title', 'content', 'date_str', 'category', 'reporter', 'link', 'keywords', 'cluster_id']]
     
     json_data = final_df.to_dict(orient='records')
     
     with open(OUTPUT_JSON, 'w', encoding='utf-8') as f:
-        json.dump(json_data, f, ensure_ascii=False, indent=4)
+        # 不縮排：檔案只給上傳器讀，縮排只會讓含全文的檔案變大
+        json.dump(json_data, f, ensure_ascii=False)
         
     print(f"✨ 清洗完成！檔案已存為: {OUTPUT_JSON}")
     # 預覽一下，確認「記者」這種詞有沒有消失
@@ -0,0 +1,108 @@
+import json
+import os
+import zstandard as zstd
+from News_dedup import make_doc_id
+
+# --- 設定區 ---
+# 內文與 metadata 分開存放：每天一個壓縮檔 + 一個位移索引
+CONTENT_DIR = "content_store"
+COMPRESSION_LEVEL = 10
+
+_compressor = zstd.ZstdCompressor(level=COMPRESSION_LEVEL)
+_decompressor = zstd.ZstdDecompressor()
+
+
+def compress_text(text):
+    return _compressor.compress(text.encode('utf-8'))
+
+
+def decompress_text(data):
+    return _decompressor.decompress(data).decode('utf-8')
+
+
+def day_of(date_str):
+    """"2025/12/16 10:30" -> "2025-12-16" """
+    return str(date_str)[:10].replace("/", "-")
+
+
+class ContentStore:
+    """
+    依日期分檔的內文庫。
+    - {day}.zst：每篇文章各自壓成一個 zstd frame，依序接在檔案後面 (只會追加)
+    - {day}.idx.json：doc_id -> [位移, 長度]，可以直接 seek 讀出單篇
+    舊日期的檔案不會再變動，每天 commit 時只有最近幾天的檔案有差異。
+    """
+
+    def __init__(self, base_dir=CONTENT_DIR):
+        self.base_dir = base_dir
+        self._indexes = {}
+
+    def _paths(self, day):
+        return (
+            os.path.join(self.base_dir, f"{day}.zst"),
+            os.path.join(self.base_dir, f"{day}.idx.json"),
+        )
+
+    def _index(self, day):
+        if day not in self._indexes:
+            _, index_path = self._paths(day)
+            if os.path.exists(index_path):
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    self._indexes[day] = json.load(f)
+            else:
+                self._indexes[day] = {}
+        return self._indexes[day]
+
+    def append(self, day, items):
+        """寫入同一天的多篇內文 [(doc_id, content), ...]，已存在的 doc_id 會略過"""
+        index = self._index(day)
+        new_items = [
+            (doc_id, content) for doc_id, content in items
+            if doc_id not in index and isinstance(content, str) and content
+        ]
+        if not new_items:
+            return 0
+
+        os.makedirs(self.base_dir, exist_ok=True)
+        data_path, index_path = self._paths(day)
+        offset = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+
+        with open(data_path, 'ab') as f:
+            for doc_id, content in new_items:
+                blob = compress_text(content)
+                f.write(blob)
+                index[doc_id] = [offset, len(blob)]
+                offset += len(blob)
+
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, separators=(",", ":"), sort_keys=True)
+        return len(new_items)
+
+    def add_dataframe(self, df):
+        """把 DataFrame (需要 link、date_str、content 欄位) 的內文依日期寫入"""
+        total = 0
+        df = df.dropna(subset=['link', 'date_str'])
+        for day, group in df.groupby(df['date_str'].map(day_of)):
+            items = [(make_doc_id(link), content) for link, content in zip(group['link'], group['content'])]
+            total += self.append(day, items)
+        return total
+
+    def get(self, doc_id, date_str):
+        """依 doc_id 讀出單篇內文 (找不到回傳 None)"""
+        day = day_of(date_str)
+        entry = self._index(day).get(doc_id)
+        if entry is None:
+            return None
+
+        data_path, _ = self._paths(day)
+        offset, length = entry
+        with open(data_path, 'rb') as f:
+            f.seek(offset)
+            return decompress_text(f.read(length))
+
+    def get_many(self, df):
+        """依 DataFrame 的 link、date_str 讀回內文 (重建索引等少見情況使用)"""
+        return [
+            self.get(make_doc_id(link), date_str)
+            for link, date_str in zip(df['link'], df['date_str'])
+        ]
@@ -2,6 +2,9 @@ from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 import requests
 from bs4 import BeautifulSoup
@@ -10,6 +13,7 @@ import time
 import random
 from datetime import datetime, timedelta, timezone
 import os
+import json
 import urllib3
 
 # 1. 關閉 SSL 安全憑證警告
@@ -27,6 +31,8 @@ START_DATE = today_in_taiwan.strftime("%Y-%m-%d")
 DAYS_TO_CRAWL = 1 
 
 OUTPUT_FILE = "ettoday_raw_data.csv"
+# 每天、每個類別在列表頁上找到幾則新聞 (給 check_count.py 比對資料庫是否漏抓)
+CRAWL_STATS_FILE = "crawl_stats.json"
 
 print(f"🤖 自動化啟動：目標日期為 {START_DATE} (台灣時間)")
 
@@ -35,64 +41,176 @@ HEADERS = {
     "Referer": "https://www.ettoday.net/",
 }
 
-def get_news_links_by_date(date_str):
+# --- Selenium 瀏覽器設定 ---
+# 捲動後等待新項目出現的最長秒數 (取代固定 sleep)
+SCROLL_TIMEOUT = 5
+# 捲到底後等待捲動位置停住的最長秒數 (讓無限捲動的事件先觸發，再往回捲)
+SCROLL_SETTLE_TIMEOUT = 2
+# 不需要的靜態資源 (圖片/CSS/字型)，擋掉可以大幅減少流量與記憶體
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.css", "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+]
+LIST_ITEM_SELECTOR = ".part_list_2 h3"
+
+# ChromeDriver 路徑快取：整個程式只呼叫一次 ChromeDriverManager().install()
+_driver_path = None
+
+def get_driver_path():
+    global _driver_path
+    if _driver_path is None:
+        print("🔧 [Selenium] 正在準備 ChromeDriver (只會執行一次)...")
+        _driver_path = ChromeDriverManager().install()
+    return _driver_path
+
+class BrowserSession:
+    """
+    共用的 headless Chrome：多個日期共用同一個瀏覽器，不用每天重開。
+    用法：
+        with BrowserSession() as browser:
+            get_news_links_by_date("2025-12-16", browser)
+    """
+
+    def __init__(self):
+        self.driver = None
+
+    def _build_options(self):
+        chrome_options = Options()
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--headless")
+        # DOM 載入完就返回，不等圖片等資源
+        chrome_options.page_load_strategy = "eager"
+        # 關閉圖片、CSS、字型的載入
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.stylesheets": 2,
+            "profile.managed_default_content_settings.fonts": 2,
+        })
+        return chrome_options
+
+    def start(self):
+        if self.driver is not None:
+            return self.driver
+
+        print("🌐 [Selenium] 啟動共用瀏覽器...")
+        self.driver = webdriver.Chrome(
+            service=Service(get_driver_path()),
+            options=self._build_options()
+        )
+        # 用 DevTools 在網路層擋掉靜態資源 (prefs 擋不到的 CSS/字型)
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except Exception as e:
+            print(f"   ⚠️ 無法設定資源封鎖，改用一般模式: {e}")
+        return self.driver
+
+    def restart(self):
+        """瀏覽器當掉時，關掉重開一個新的"""
+        self.quit()
+        return self.start()
+
+    def quit(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.quit()
+
+def count_list_items(driver):
+    return driver.execute_script(
+        f"return document.querySelectorAll('{LIST_ITEM_SELECTOR}').length;"
+    )
+
+def last_list_date(driver):
+    return driver.execute_script(
+        "var d = document.querySelectorAll('.part_list_2 .date');"
+        "return d.length ? d[d.length - 1].textContent.trim() : '';"
+    )
+
+def scroll_position(driver):
+    return driver.execute_script("return window.pageYOffset + window.innerHeight;")
+
+def wait_scroll_settled(driver):
+    """等捲動位置連續兩次檢查都沒有變化 (已經停在底部)"""
+    last = [None]
+
+    def settled(d):
+        position = scroll_position(d)
+        done = position == last[0]
+        last[0] = position
+        return done
+
+    try:
+        WebDriverWait(driver, SCROLL_SETTLE_TIMEOUT, poll_frequency=0.25).until(settled)
+    except TimeoutException:
+        pass
+
+def scroll_until_date_end(driver, target_date_slash):
+    """不斷捲動到底，每次等待新的 h3 出現，直到出現前一天的新聞或沒有新資料"""
+    wait = WebDriverWait(driver, SCROLL_TIMEOUT, poll_frequency=0.2)
+    retry_count = 0
+    MAX_RETRIES = 3
+
+    while True:
+        # 日期檢查：每一輪都先做 (跟重試無關)，列表已經到前一天就不用再等
+        last_date_text = last_list_date(driver)
+        if last_date_text and last_date_text[:10] != target_date_slash:
+            print(f"   🛑 偵測到前一日新聞 ({last_date_text})，停止捲動。")
+            break
+
+        item_count = count_list_items(driver)
+
+        # 捲動邏輯：先捲到底，等位置停住讓載入事件觸發，再往回一點
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        wait_scroll_settled(driver)
+        driver.execute_script("window.scrollBy(0, -300);")
+
+        # 等待新項目出現 (事件驅動，取代固定 sleep)
+        try:
+            wait.until(lambda d: count_list_items(d) > item_count)
+            retry_count = 0
+        except TimeoutException:
+            retry_count += 1
+            print(f"   ⚠️ 沒有新項目，第 {retry_count}/{MAX_RETRIES} 次重試...")
+            if retry_count >= MAX_RETRIES:
+                print("   🛑 已達重試上限，停止捲動。")
+                break
+
+def get_news_links_by_date(date_str, browser=None):
     url = f"https://www.ettoday.net/news/news-list-{date_str}-0.htm"
     print(f"\n📡 [Selenium] 正在開啟瀏覽器抓取列表: {url}")
     
     target_date_slash = date_str.replace("-", "/") 
-    
-    chrome_options = Options()
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--headless") 
+
+    # 沒有傳入共用瀏覽器時，就自己開一個用完關掉
+    own_browser = browser is None
+    if own_browser:
+        browser = BrowserSession()
 
     html_source = ""
 
     try:
-        driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()), 
-            options=chrome_options
+        try:
+            driver = browser.start()
+            driver.get(url)
+        except WebDriverException:
+            # 共用的瀏覽器可能已經掛掉，重開一次
+            driver = browser.restart()
+            driver.get(url)
+
+        WebDriverWait(driver, SCROLL_TIMEOUT * 2).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, LIST_ITEM_SELECTOR))
         )
-        
-        driver.get(url)
-        time.sleep(2)
-        
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        retry_count = 0
-        MAX_RETRIES = 3
-        
-        while True:
-            # 捲動邏輯
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(0.5)
-            driver.execute_script("window.scrollBy(0, -300);")
-            time.sleep(2)
-            
-            # 日期檢查
-            try:
-                date_elements = driver.find_elements(By.CSS_SELECTOR, ".part_list_2 .date")
-                if date_elements:
-                    last_date_text = date_elements[-1].text.strip()
-                    current_date_on_page = last_date_text[:10]
-                    if current_date_on_page != target_date_slash:
-                        print(f"   🛑 偵測到前一日新聞 ({last_date_text})，停止捲動。")
-                        break
-            except Exception:
-                pass
 
-            # 高度檢查
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                retry_count += 1
-                print(f"   ⚠️ 高度未變化，第 {retry_count}/{MAX_RETRIES} 次重試...")
-                if retry_count >= MAX_RETRIES:
-                    print("   🛑 已達重試上限，停止捲動。")
-                    break
-                else:
-                    time.sleep(2)
-                    continue
-            else:
-                retry_count = 0
-                last_height = new_height
+        scroll_until_date_end(driver, target_date_slash)
         
         # 2.在瀏覽器還活著的時候，把原始碼存進變數
         print("   📥 正在下載網頁原始碼...")
@@ -103,8 +221,8 @@ def get_news_links_by_date(date_str):
         return []
     
     finally:
-        if 'driver' in locals():
-            driver.quit()
+        if own_browser:
+            browser.quit()
         
     # --- 解析 HTML ---
     
@@ -144,6 +262,27 @@ def get_news_links_by_date(date_str):
     print(f"✅ {date_str} 最終整理出 {len(news_list)} 則新聞")
     return news_list
 
+def save_crawl_stats(links_by_date):
+    """記錄每天 x 類別在列表頁找到的新聞數 (同一天重跑會以最新的列表覆蓋)"""
+    stats = {}
+    if os.path.exists(CRAWL_STATS_FILE):
+        with open(CRAWL_STATS_FILE, 'r', encoding='utf-8') as f:
+            stats = json.load(f)
+
+    for date, news_items in links_by_date.items():
+        if not news_items:
+            continue
+        counts = {}
+        # 同一個連結只算一次
+        unique_items = {news["link"]: news for news in news_items}.values()
+        for news in unique_items:
+            counts[news["category"]] = counts.get(news["category"], 0) + 1
+        stats[date] = counts
+
+    with open(CRAWL_STATS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, ensure_ascii=False, indent=2)
+    print(f"🧾 已記錄列表統計至 {CRAWL_STATS_FILE}")
+
 def get_news_content(url):
     """抓取內文 (開啟除錯模式)"""
     try:
@@ -182,10 +321,19 @@ if __name__ == "__main__":
 
     total_count = 0
 
+    # 1. 先用同一個瀏覽器把所有日期的列表抓完，再關掉瀏覽器 (抓內文不需要它)
+    links_by_date = {}
+    with BrowserSession() as browser:
+        for date in date_list:
+            links_by_date[date] = get_news_links_by_date(date, browser)
+
+    save_crawl_stats(links_by_date)
+
+    # 2. 逐日抓內文
     for date in date_list:
         print(f"🚀 日期: {date}")
         
-        news_items = get_news_links_by_date(date)
+        news_items = links_by_date[date]
         
         if not news_items:
             continue
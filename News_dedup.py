@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import re
+import numpy as np
+
+# --- 設定區 ---
+INDEX_FILE = "simhash_index.json"
+
+# SimHash 指紋長度 (bit)
+SIMHASH_BITS = 64
+# 兩篇文章指紋的漢明距離 <= 3 就視為同一則新聞
+# 合成資料上，門檻 8 的召回率高很多 (只加署名 99.9%、改一句 97%，門檻 3 只有 84% / 34%)，
+# 但還沒有用真實的 ETtoday 轉載驗證：天氣、股價、賽事比分這類格式固定的短稿在距離 8 很可能互撞，
+# 而且 7 bit 的分段太窄 (每次查詢要比對約 7% 的文章)。在真實資料上驗證前維持 3。
+HAMMING_THRESHOLD = 3
+# 把 64 bit 切成 4 段 (每段 16 bit) 當索引
+# (鴿籠原理：距離 <= 3 的兩個指紋，至少有 1 段完全相同；每次查詢只比對同桶的少數候選)
+NUM_BANDS = HAMMING_THRESHOLD + 1
+BAND_BITS = SIMHASH_BITS // NUM_BANDS
+# 以 3 個字為一組 (shingle) 計算特徵
+SHINGLE_SIZE = 3
+
+_BIT_SHIFTS = np.arange(SIMHASH_BITS, dtype=np.uint64)
+
+
+def make_doc_id(link):
+    """跟上傳器相同的規則：用網址的 MD5 當 Document ID"""
+    return hashlib.md5(link.encode('utf-8')).hexdigest()
+
+
+def normalize_content(text):
+    """去掉空白與標點，只留文字本身 (轉載時常常只差排版)"""
+    if not isinstance(text, str):
+        return ""
+    return re.sub(r"[\W_]+", "", text)
+
+
+def simhash(text):
+    """
+    計算內文的 64-bit SimHash 指紋。
+    內文太短 (不足一個 shingle) 時回傳 None。
+    """
+    text = normalize_content(text)
+    if len(text) < SHINGLE_SIZE:
+        return None
+
+    # 統計每個 shingle 出現次數當作權重
+    counts = {}
+    for i in range(len(text) - SHINGLE_SIZE + 1):
+        shingle = text[i:i + SHINGLE_SIZE]
+        counts[shingle] = counts.get(shingle, 0) + 1
+
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big') for s in counts),
+        dtype=np.uint64,
+        count=len(counts),
+    )
+    weights = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+
+    # 向量化：每個 bit 依權重投票 (1 加分、0 扣分)
+    bits = ((hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)).astype(np.int64)
+    votes = (weights[:, None] * (2 * bits - 1)).sum(axis=0)
+
+    fingerprint = 0
+    for i in np.nonzero(votes > 0)[0]:
+        fingerprint |= 1 << int(i)
+    return fingerprint
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+class SimHashIndex:
+    """
+    近似重複新聞的指紋索引。
+    - signatures: doc_id -> (指紋, cluster_id)
+    - bands: 每一段 bit 的值 -> doc_id 集合，查詢時只比對同桶的候選文章 (不用全部掃過)
+    cluster_id 是該群組第一篇文章的 doc_id。
+    """
+
+    def __init__(self):
+        self.signatures = {}
+        self.bands = [{} for _ in range(NUM_BANDS)]
+        # 目前的分群是用哪個門檻算的 (舊索引讀進來時可能不同)
+        self.threshold = HAMMING_THRESHOLD
+
+    def __len__(self):
+        return len(self.signatures)
+
+    @staticmethod
+    def _band_keys(fingerprint):
+        mask = (1 << BAND_BITS) - 1
+        return [(fingerprint >> (i * BAND_BITS)) & mask for i in range(NUM_BANDS)]
+
+    def _insert(self, doc_id, fingerprint, cluster_id):
+        self.signatures[doc_id] = (fingerprint, cluster_id)
+        for band, key in zip(self.bands, self._band_keys(fingerprint)):
+            band.setdefault(key, set()).add(doc_id)
+
+    def find(self, fingerprint):
+        """找出最相近且距離在門檻內的文章，回傳它的 cluster_id (找不到回傳 None)"""
+        candidates = set()
+        for band, key in zip(self.bands, self._band_keys(fingerprint)):
+            candidates.update(band.get(key, ()))
+
+        best_cluster, best_distance = None, HAMMING_THRESHOLD + 1
+        for doc_id in candidates:
+            other_fp, cluster_id = self.signatures[doc_id]
+            distance = hamming_distance(fingerprint, other_fp)
+            if distance < best_distance:
+                best_cluster, best_distance = cluster_id, distance
+        return best_cluster
+
+    def assign(self, doc_id, content):
+        """
+        幫一篇文章決定 cluster_id，並加入索引。
+        已經在索引裡的文章直接回傳原本的 cluster_id。
+        """
+        if doc_id in self.signatures:
+            return self.signatures[doc_id][1]
+
+        fingerprint = simhash(content)
+        if fingerprint is None:
+            return doc_id
+
+        cluster_id = self.find(fingerprint) or doc_id
+        self._insert(doc_id, fingerprint, cluster_id)
+        return cluster_id
+
+    def cluster_of(self, doc_id):
+        entry = self.signatures.get(doc_id)
+        return entry[1] if entry else doc_id
+
+    def recluster(self):
+        """
+        門檻改變後，用已存的指紋 (不需要內文) 依原本加入的順序重新分群。
+        回傳 cluster_id 有變動的文章數。
+        """
+        old = self.signatures
+        self.signatures = {}
+        self.bands = [{} for _ in range(NUM_BANDS)]
+        self.threshold = HAMMING_THRESHOLD
+
+        changed = 0
+        for doc_id, (fingerprint, old_cluster) in old.items():
+            cluster_id = self.find(fingerprint) or doc_id
+            self._insert(doc_id, fingerprint, cluster_id)
+            changed += cluster_id != old_cluster
+        return changed
+
+    def assign_dataframe(self, df):
+        """對 DataFrame 的每一列 (需要 link 與 content 欄位) 算出 cluster_id"""
+        return [
+            self.assign(make_doc_id(link), content)
+            for link, content in zip(df['link'], df['content'])
+        ]
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        index = cls()
+        if not os.path.exists(path):
+            return index
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        for doc_id, (fp_hex, cluster_id) in data.get("docs", {}).items():
+            index._insert(doc_id, int(fp_hex, 16), cluster_id)
+        index.threshold = data.get("threshold", HAMMING_THRESHOLD)
+        return index
+
+    def save(self, path=INDEX_FILE):
+        data = {
+            "bits": SIMHASH_BITS,
+            "threshold": self.threshold,
+            "docs": {
+                doc_id: [f"{fp:016x}", cluster_id]
+                for doc_id, (fp, cluster_id) in self.signatures.items()
+            },
+        }
+        # 不縮排，讓每天 commit 的檔案盡量小
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
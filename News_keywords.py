@@ -0,0 +1,152 @@
+import gzip
+import json
+import os
+import re
+import jieba
+import numpy as np
+
+# --- 設定區 ---
+# 不壓縮、依詞排序、一行一個詞：每天 commit 時 Git 只需要存有變動的那幾行
+MODEL_FILE = "keyword_df.json"
+# 舊版的 gzip 檔 (讀得到就沿用，下次存檔時換成新格式並刪掉)
+LEGACY_MODEL_FILE = "keyword_df.json.gz"
+
+# 累積超過 PRUNE_AFTER_DOCS 篇後，存檔時丟掉文件頻率 < MIN_DF 的罕見詞
+# (這次才新看到的詞先留著，等下次歸檔還是只出現 1 篇才丟)
+MIN_DF = 2
+PRUNE_AFTER_DOCS = 1000
+
+# 標題的詞比內文重要，計算詞頻時乘上這個權重
+TITLE_WEIGHT = 3
+# 每篇文章取幾個關鍵詞
+TOP_K = 5
+
+_WORD_PATTERN = re.compile(r"\w")
+
+
+class KeywordModel:
+    """
+    以我們自己的新聞庫計算 IDF 的 TF-IDF 關鍵詞模型。
+    - df: 詞 -> 出現過的文章數 (document frequency)
+    - n_docs: 已累積的文章數
+    每次只用「新文章」增量更新，不需要重算整個歷史。
+    """
+
+    def __init__(self, stop_words=None):
+        self.stop_words = set(stop_words or ())
+        self.n_docs = 0
+        self.df = {}
+        # 這次執行才加入的詞 (存檔時不修剪)
+        self._fresh = set()
+
+    def __len__(self):
+        return self.n_docs
+
+    def _keep(self, word):
+        # --- 過濾邏輯 ---
+        # 1. 必須不在黑名單
+        # 2. 長度 > 1 (過濾單字)
+        # 3. 不能是純數字
+        # 4. 至少要有一個文字 (過濾標點)
+        return (
+            len(word) > 1
+            and word not in self.stop_words
+            and not word.isdigit()
+            and _WORD_PATTERN.search(word) is not None
+        )
+
+    def tokenize(self, title, content=None):
+        """斷詞並計算一篇文章的詞頻 (標題加權)，回傳 {詞: 次數}"""
+        counts = {}
+        for text, weight in ((title, TITLE_WEIGHT), (content, 1)):
+            if not isinstance(text, str):
+                continue
+            for word in jieba.cut(text):
+                word = word.strip()
+                if self._keep(word):
+                    counts[word] = counts.get(word, 0) + weight
+        return counts
+
+    def tokenize_batch(self, titles, contents):
+        return [self.tokenize(t, c) for t, c in zip(titles, contents)]
+
+    def update(self, docs):
+        """把新文章 (tokenize 的結果) 加進文件頻率表"""
+        for counts in docs:
+            for word in counts:
+                self.df[word] = self.df.get(word, 0) + 1
+            self._fresh.update(counts)
+        self.n_docs += len(docs)
+
+    def extract_batch(self, docs, top_k=TOP_K):
+        """
+        一次計算整批文章的 TF-IDF 並取出前 top_k 個關鍵詞。
+        全部的 (文章, 詞) 攤平成一維陣列，用 numpy 一次算完分數。
+        """
+        if not docs:
+            return []
+
+        # 本批的詞彙表
+        vocab = {}
+        term_ids, term_counts, doc_ptr = [], [], [0]
+        for counts in docs:
+            for word, count in counts.items():
+                term_ids.append(vocab.setdefault(word, len(vocab)))
+                term_counts.append(count)
+            doc_ptr.append(len(term_ids))
+
+        if not vocab:
+            return [[] for _ in docs]
+
+        words = list(vocab)
+        df = np.fromiter((self.df.get(w, 0) for w in words), dtype=np.float64, count=len(words))
+        idf = np.log((self.n_docs + 1) / (df + 1)) + 1
+
+        term_ids = np.asarray(term_ids)
+        scores = np.asarray(term_counts, dtype=np.float64) * idf[term_ids]
+
+        results = []
+        for start, end in zip(doc_ptr[:-1], doc_ptr[1:]):
+            if start == end:
+                results.append([])
+                continue
+            doc_scores = scores[start:end]
+            # 分數高的排前面 (同分時保留原本順序)
+            top = np.argsort(-doc_scores, kind='stable')[:top_k]
+            results.append([words[i] for i in term_ids[start:end][top]])
+        return results
+
+    def prune(self):
+        """丟掉罕見詞，回傳刪掉的詞數 (IDF 幾乎不變：沒看過的詞本來就視為最罕見)"""
+        if self.n_docs < PRUNE_AFTER_DOCS:
+            return 0
+        rare = [w for w, n in self.df.items() if n < MIN_DF and w not in self._fresh]
+        for word in rare:
+            del self.df[word]
+        return len(rare)
+
+    @classmethod
+    def load(cls, path=MODEL_FILE, stop_words=None):
+        model = cls(stop_words)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        elif path == MODEL_FILE and os.path.exists(LEGACY_MODEL_FILE):
+            with gzip.open(LEGACY_MODEL_FILE, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        else:
+            return model
+
+        model.n_docs = data.get("n_docs", 0)
+        model.df = data.get("df", {})
+        return model
+
+    def save(self, path=MODEL_FILE):
+        self.prune()
+        data = {"n_docs": self.n_docs, "df": self.df}
+        # indent=0 + sort_keys：一行一個詞、順序固定，Git 可以只存差異
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=0, sort_keys=True)
+
+        if path == MODEL_FILE and os.path.exists(LEGACY_MODEL_FILE):
+            os.remove(LEGACY_MODEL_FILE)
@@ -0,0 +1,455 @@
+import ast
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional, Tuple
+import pandas as pd
+from News_dedup import make_doc_id
+
+# --- 設定區 ---
+# 由每日歸檔 (update_csv.py) 維護的本地分析資料庫
+DB_FILE = "news_history.db"
+# 資料庫是二進位檔，不進 Git：歸檔 Action 把壓縮後的快照上傳到這個 GitHub Release，
+# 儀表板啟動時直接下載來用 (不用再由 CSV 重建)
+SNAPSHOT_FILE = "news_history.db.gz"
+SNAPSHOT_TAG = "archive-snapshot"
+# 快照說明檔 (歸檔時間、筆數、下載網址)，很小的文字檔，跟 CSV 一起 commit
+MANIFEST_FILE = "news_history.snapshot.json"
+
+# 資料表結構改變時 +1：舊版資料庫會整個重建 (資料可以再由 CSV 與 Firebase 匯入)
+SCHEMA_VERSION = 2
+
+# 排序/篩選用的欄位一律 NOT NULL DEFAULT ''，才能直接用欄位本身排序 (走索引，不用 COALESCE)
+# dup_rank：文章在自己的近似重複群組裡的名次 (依 date_str, doc_id)，0 代表群組代表
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    doc_id     TEXT PRIMARY KEY,
+    date_str   TEXT NOT NULL,
+    category   TEXT NOT NULL DEFAULT '',
+    reporter   TEXT NOT NULL DEFAULT '',
+    title      TEXT NOT NULL DEFAULT '',
+    link       TEXT,
+    keywords   TEXT,
+    cluster_id TEXT NOT NULL,
+    dup_rank   INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_articles_date_str ON articles (date_str, doc_id);
+CREATE INDEX IF NOT EXISTS idx_articles_category ON articles (category, date_str, doc_id);
+CREATE INDEX IF NOT EXISTS idx_articles_reporter ON articles (reporter, date_str, doc_id);
+CREATE INDEX IF NOT EXISTS idx_articles_category_page ON articles (category, doc_id);
+CREATE INDEX IF NOT EXISTS idx_articles_reporter_page ON articles (reporter, doc_id);
+CREATE INDEX IF NOT EXISTS idx_articles_title_page ON articles (title, doc_id);
+CREATE INDEX IF NOT EXISTS idx_articles_cluster ON articles (cluster_id, dup_rank);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+@contextmanager
+def open_store(path=DB_FILE):
+    """開啟資料庫 (不存在就建立)，離開時自動 commit 並關閉"""
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            conn.executescript("DROP TABLE IF EXISTS articles; DROP TABLE IF EXISTS meta;")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.executescript(SCHEMA)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _clean(value):
+    """pandas 的 NaN 轉成 None，SQLite 才會存成 NULL"""
+    if value is None:
+        return None
+    if isinstance(value, float) and pd.isna(value):
+        return None
+    return value
+
+
+def _text(value):
+    value = _clean(value)
+    return "" if value is None else str(value)
+
+
+def normalize_keywords(value):
+    """
+    keywords 可能是 list (Firebase) 或字串 (CSV 讀進來的 "['a', 'b']")，
+    統一轉成 JSON 字串存進資料庫。
+    """
+    value = _clean(value)
+    if value is None:
+        words = []
+    elif isinstance(value, str):
+        try:
+            words = json.loads(value)
+        except ValueError:
+            try:
+                words = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                words = [value]
+        if not isinstance(words, list):
+            words = [value]
+    else:
+        words = list(value)
+    return json.dumps([str(w) for w in words], ensure_ascii=False)
+
+
+def upsert_articles(conn, records):
+    """
+    寫入或更新文章 (以 doc_id = 連結 MD5 為主鍵)。
+    records 可以是 DataFrame 或 dict 的 list，內文 (content) 不會存進資料庫。
+    """
+    if isinstance(records, pd.DataFrame):
+        records = records.to_dict(orient='records')
+
+    rows = []
+    for rec in records:
+        link = _clean(rec.get('link'))
+        date_str = _clean(rec.get('date_str'))
+        if not link or not date_str:
+            continue
+        doc_id = rec.get('doc_id') or make_doc_id(link)
+        rows.append((
+            doc_id,
+            str(date_str),
+            _text(rec.get('category')),
+            _text(rec.get('reporter')),
+            _text(rec.get('title')),
+            link,
+            normalize_keywords(rec.get('keywords')),
+            _clean(rec.get('cluster_id')) or doc_id,
+        ))
+
+    # 空的資料庫 (由 CSV 整批匯入)：不用查舊群組，最後整張表一次排名
+    bulk = count_all(conn) == 0
+    old_clusters = set() if bulk else _clusters_of(conn, [row[0] for row in rows])
+    # 依主鍵排序後寫入，B-tree 只需要一直往後接
+    rows.sort(key=lambda row: row[0])
+    if bulk:
+        # 整批匯入時先拿掉次要索引，寫完再一次建立 (比逐筆維護快)
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'articles' AND sql IS NOT NULL"
+        ).fetchall():
+            conn.execute(f"DROP INDEX {name}")
+    conn.executemany(
+        """
+        INSERT INTO articles (doc_id, date_str, category, reporter, title, link, keywords, cluster_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (doc_id) DO UPDATE SET
+            date_str = excluded.date_str,
+            category = excluded.category,
+            reporter = excluded.reporter,
+            title = excluded.title,
+            link = excluded.link,
+            keywords = excluded.keywords,
+            cluster_id = excluded.cluster_id
+        """,
+        rows,
+    )
+
+    if bulk:
+        # executescript 會先 commit，這裡只重跑建索引的那幾句
+        for statement in SCHEMA.split(";"):
+            if "CREATE INDEX" in statement:
+                conn.execute(statement)
+    # 新文章的群組，以及被改到別的群組的文章原本的群組，都要重排名次
+    update_dup_ranks(conn, None if bulk else old_clusters | {row[7] for row in rows})
+    return len(rows)
+
+
+def _clusters_of(conn, doc_ids):
+    clusters = set()
+    doc_ids = list(doc_ids)
+    # SQLite 一次能帶的參數有限，分批查
+    for start in range(0, len(doc_ids), 500):
+        chunk = doc_ids[start:start + 500]
+        clusters.update(
+            row[0] for row in conn.execute(
+                f"SELECT cluster_id FROM articles WHERE doc_id IN ({', '.join('?' for _ in chunk)})", chunk
+            )
+        )
+    return clusters
+
+
+def update_dup_ranks(conn, clusters=None):
+    """
+    重算群組內每篇文章的 dup_rank (依 date_str, doc_id 排名，最早的是 0)。
+    寫入時就算好，查詢合併重複時只要看這個有索引的欄位，不用 GROUP BY。
+    clusters 為 None 時整張表一次用視窗函數重算 (整批匯入用)。
+    """
+    if clusters is None:
+        conn.execute(
+            """
+            UPDATE articles SET dup_rank = ranked.dup_rank
+            FROM (
+                SELECT doc_id, ROW_NUMBER() OVER (PARTITION BY cluster_id ORDER BY date_str, doc_id) - 1 AS dup_rank
+                FROM articles
+            ) AS ranked
+            WHERE articles.doc_id = ranked.doc_id AND articles.dup_rank != ranked.dup_rank
+            """
+        )
+        return
+
+    conn.executemany(
+        """
+        UPDATE articles SET dup_rank = (
+            SELECT COUNT(*) FROM articles AS b
+            WHERE b.cluster_id = articles.cluster_id
+              AND (b.date_str, b.doc_id) < (articles.date_str, articles.doc_id)
+        )
+        WHERE cluster_id = ?
+        """,
+        [(cluster_id,) for cluster_id in clusters],
+    )
+
+
+def delete_articles(conn, doc_ids):
+    clusters = _clusters_of(conn, doc_ids)
+    conn.executemany("DELETE FROM articles WHERE doc_id = ?", [(doc_id,) for doc_id in doc_ids])
+    update_dup_ranks(conn, clusters)
+    return len(doc_ids)
+
+
+def get_meta(conn, key, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def set_meta(conn, key, value):
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) "
+        "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+        (key, str(value)),
+    )
+
+
+def export_snapshot(db_path=DB_FILE, snapshot_path=SNAPSHOT_FILE, manifest_path=MANIFEST_FILE, url=None):
+    """壓縮資料庫成快照，並寫出說明檔 (歸檔 Action 用)"""
+    with open_store(db_path) as conn:
+        manifest = {
+            "archived_at": get_meta(conn, "archived_at"),
+            "rows": count_all(conn),
+            "schema_version": SCHEMA_VERSION,
+            "url": url,
+        }
+
+    with open(db_path, 'rb') as src, gzip.open(snapshot_path, 'wb', compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst)
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def read_manifest(path=MANIFEST_FILE):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def count_all(conn):
+    return conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+
+def max_date_str(conn):
+    return conn.execute("SELECT MAX(date_str) FROM articles").fetchone()[0]
+
+
+def _in_clause(column, values, params):
+    # 空的清單代表「什麼都不選」
+    if not values:
+        return "0"
+    params.extend(values)
+    return f"{column} IN ({', '.join('?' for _ in values)})"
+
+
+@dataclass(frozen=True)
+class ArticleFilter:
+    """
+    儀表板的篩選條件，轉成 SQL 的 WITH 子句，結果固定叫做 v。
+    date_str 格式為 "2025/12/16 10:30"，所以日期區間可以直接用字串比較 (走索引)。
+    不可變、欄位都是 tuple，才能當 st.cache_data 的快取 key。
+    categories 為 None 代表不篩類別；reporters 空的代表不篩記者。
+    """
+
+    start_date: date
+    end_date: date
+    categories: Optional[Tuple[str, ...]] = None
+    reporters: Tuple[str, ...] = ()
+    collapse_dups: bool = False
+
+    def __post_init__(self):
+        # 呼叫端常常直接傳 multiselect 的 list 進來，統一轉成 tuple
+        if self.categories is not None:
+            object.__setattr__(self, "categories", tuple(self.categories))
+        object.__setattr__(self, "reporters", tuple(self.reporters or ()))
+
+    def _conditions(self, alias, params, date_index=True):
+        start = self.start_date.strftime("%Y/%m/%d")
+        end = (self.end_date + timedelta(days=1)).strftime("%Y/%m/%d")
+        params.extend([start, end])
+        # 欄位前面加 + 是 SQLite 的寫法：這個條件不要用索引 (逐筆檢查)
+        column = f"{alias}.date_str" if date_index else f"+{alias}.date_str"
+        conditions = [f"{column} >= ?", f"{column} < ?"]
+        if self.categories is not None:
+            conditions.append(_in_clause(f"{alias}.category", list(self.categories), params))
+        if self.reporters:
+            conditions.append(_in_clause(f"{alias}.reporter", list(self.reporters), params))
+        return " AND ".join(conditions)
+
+    def cte(self, date_index=True):
+        """
+        date_index=False 時日期區間不走索引，讓 SQLite 改沿著排序欄位的索引讀
+        (文章列表依類別/記者/標題分頁時用，讀滿一頁就停，不必先把區間內的文章全部排序)
+        """
+        params = []
+        where = self._conditions("a", params, date_index)
+
+        # 近似重複新聞：同一個群組只保留「符合篩選條件」裡名次最前面的一篇
+        # (先篩選再合併，群組代表剛好在別的類別時，才不會整個群組被篩掉)
+        # 大部分文章 dup_rank = 0 (自己就是群組代表)，只有重複的文章才要往回查同群組 (走 cluster 索引)
+        if self.collapse_dups:
+            where += (
+                " AND (a.dup_rank = 0 OR NOT EXISTS (SELECT 1 FROM articles AS b "
+                "WHERE b.cluster_id = a.cluster_id AND b.dup_rank < a.dup_rank AND "
+                f"{self._conditions('b', params)}))"
+            )
+
+        # 單純的 SELECT，SQLite 會把 v 展開到外層查詢裡 (不會先物化)，排序與計數都能走索引
+        return f"WITH v AS (SELECT a.* FROM articles AS a WHERE {where}) ", params
+
+
+def query_df(conn, flt, select_sql, extra_params=(), date_index=True):
+    cte, params = flt.cte(date_index)
+    return pd.read_sql_query(cte + select_sql, conn, params=params + list(extra_params))
+
+
+def query_value(conn, flt, select_sql):
+    cte, params = flt.cte()
+    row = conn.execute(cte + select_sql, params).fetchone()
+    return row[0] if row else None
+
+
+# --- 儀表板用的查詢 ---
+
+def count_articles(conn, flt):
+    return query_value(conn, flt, "SELECT COUNT(*) FROM v")
+
+
+def distinct_values(conn, flt, column):
+    if column not in ('category', 'reporter'):
+        raise ValueError(f"不支援的欄位: {column}")
+    df = query_df(conn, flt, f"SELECT DISTINCT {column} AS value FROM v WHERE {column} != '' ORDER BY value")
+    return df['value'].astype(str).tolist()
+
+
+def count_distinct_categories(conn, flt):
+    return query_value(conn, flt, "SELECT COUNT(DISTINCT category) FROM v WHERE category != ''")
+
+
+def top_reporter(conn, flt):
+    """最活躍記者 (排除 Unknown)，同票時取字母順序第一個"""
+    return query_value(
+        conn, flt,
+        "SELECT reporter FROM v WHERE reporter NOT IN ('', 'Unknown') "
+        "GROUP BY reporter ORDER BY COUNT(*) DESC, reporter LIMIT 1"
+    )
+
+
+def category_counts(conn, flt):
+    return query_df(conn, flt, "SELECT category, COUNT(*) AS count FROM v GROUP BY category ORDER BY count DESC")
+
+
+def daily_counts(conn, flt):
+    return query_df(conn, flt, "SELECT substr(date_str, 1, 10) AS date, COUNT(*) AS count FROM v GROUP BY date ORDER BY date")
+
+
+def reporter_counts(conn, flt, limit=20):
+    return query_df(
+        conn, flt,
+        "SELECT reporter, COUNT(*) AS count FROM v WHERE reporter NOT IN ('', 'Unknown') "
+        "GROUP BY reporter ORDER BY count DESC, reporter LIMIT ?",
+        (limit,),
+    )
+
+
+def reporter_category_counts(conn, flt):
+    return query_df(conn, flt, "SELECT reporter, category, COUNT(*) AS count FROM v GROUP BY reporter, category")
+
+
+def daily_reporter_counts(conn, flt):
+    return query_df(
+        conn, flt,
+        "SELECT substr(date_str, 1, 10) AS date, reporter, COUNT(*) AS count FROM v GROUP BY date, reporter ORDER BY date"
+    )
+
+
+def keyword_frequencies(conn, flt, limit=200):
+    """把每篇文章的 keywords (JSON) 展開後統計詞頻，給文字雲用"""
+    df = query_df(
+        conn, flt,
+        "SELECT j.value AS word, COUNT(*) AS count FROM v, json_each(v.keywords) AS j "
+        "GROUP BY word ORDER BY count DESC LIMIT ?",
+        (limit,),
+    )
+    return dict(zip(df['word'], df['count']))
+
+
+# 文章列表可以排序的欄位
+SORTABLE_COLUMNS = ('date_str', 'category', 'reporter', 'title')
+# 符合條件的文章超過這個數量時，分頁改沿著排序欄位的索引讀 (讀滿一頁就停)；
+# 數量不多時直接排序反而比較快 (例如只看一天)
+SORT_INDEX_MIN_ROWS = 2000
+
+
+def fetch_article_page(conn, flt, sort_column='date_str', descending=True, page_size=50, cursor=None,
+                       match_count=None):
+    """
+    文章列表的 keyset 分頁：以 (排序欄位, doc_id) 當游標，只取一頁。
+    排序欄位都有 (欄位, doc_id) 索引，符合的文章很多時直接沿著索引往下讀，不用 OFFSET 也不用整批排序。
+    match_count：符合條件的文章數 (呼叫端通常已經算好)，用來決定要不要走排序索引。
+    回傳 (這一頁的 DataFrame, 下一頁的游標；沒有下一頁時為 None)
+    """
+    if sort_column not in SORTABLE_COLUMNS:
+        raise ValueError(f"不支援的排序欄位: {sort_column}")
+
+    op, order = ("<", "DESC") if descending else (">", "ASC")
+
+    # 依日期排序時日期索引本身就是順序；其他欄位在文章很多時改走 (欄位, doc_id) 索引
+    # (有選記者時，記者索引已經夠精準，交給 SQLite 決定)
+    use_sort_index = (
+        sort_column != 'date_str'
+        and not flt.reporters
+        and (match_count is None or match_count > SORT_INDEX_MIN_ROWS)
+    )
+
+    where, params = "", []
+    if cursor is not None:
+        where = f"WHERE ({sort_column}, doc_id) {op} (?, ?)"
+        params = list(cursor)
+
+    # 多拿一筆，用來判斷還有沒有下一頁
+    df = query_df(
+        conn, flt,
+        f"SELECT doc_id, date_str, category, reporter, title, link FROM v {where} "
+        f"ORDER BY {sort_column} {order}, doc_id {order} LIMIT ?",
+        params + [page_size + 1],
+        date_index=not use_sort_index,
+    )
+
+    next_cursor = None
+    if len(df) > page_size:
+        df = df.iloc[:page_size]
+        next_cursor = (df[sort_column].iloc[-1], df['doc_id'].iloc[-1])
+    return df.drop(columns=['doc_id']), next_cursor
@@ -0,0 +1,228 @@
+import threading
+import time
+from News_store import open_store, upsert_articles, delete_articles, get_meta, set_meta, max_date_str
+
+# --- 設定區 ---
+COLLECTION_NAME = "news"
+# 儀表板只需要這些欄位 (不抓 content，大幅減少傳輸量)
+SYNC_FIELDS = ["title", "date_str", "category", "reporter", "link", "keywords", "cluster_id"]
+# 同一個程序內，兩次同步至少間隔幾秒
+SYNC_INTERVAL = 60
+# 完全沒有資料時的預設起點
+DEFAULT_START = "2025-11-01"
+# Firestore 的文件 ID 欄位 (等同 FieldPath.document_id()，不必為此 import firebase_admin)
+DOCUMENT_ID = "__name__"
+
+
+class FirestoreSync:
+    """
+    Firestore -> 本地資料庫的增量同步。
+    記住最後看到的 (date_str, doc_id) 當作 watermark，下次只抓排在它之後的文件。
+    watermark 存在資料庫的 meta 表；同一個程序只建立一個 (搭配 st.cache_resource)，所有使用者共用。
+    可以用 start_listener() 改成由 Firebase 主動推送 (on_snapshot)，
+    沒有監聽器時才退回 sync() 輪詢。
+    """
+
+    def __init__(self, db, db_path, collection=COLLECTION_NAME, interval=SYNC_INTERVAL):
+        # db 可以先給 None，之後由 start_in_background() 在背景連線
+        self.db = db
+        self.db_path = db_path
+        self.collection = collection
+        self.interval = interval
+        self.last_synced = 0.0
+        # 每套用一次新資料就 +1，可以拿來當快取的 key
+        self.version = 0
+        self._lock = threading.Lock()
+        self._watch = None
+        # 監聽器是從哪一天的 watermark 開始的；watermark 換日後要重新掛 (見 _on_snapshot)
+        self._anchor_day = None
+        self._reanchoring = False
+        self._started = False
+        # 背景連線後發現沒有 Firebase 金鑰
+        self.unavailable = False
+
+    def watermark(self):
+        with open_store(self.db_path) as conn:
+            date_str = get_meta(conn, "sync_date_str")
+            doc_id = get_meta(conn, "sync_doc_id")
+            if date_str is None:
+                # 剛載入歸檔快照：從快照的最後日期開始
+                date_str = max_date_str(conn) or DEFAULT_START
+        return date_str, doc_id
+
+    def _save_watermark(self, conn, date_str, doc_id):
+        """只往前推進 watermark (推送的順序不一定照時間)"""
+        current = (get_meta(conn, "sync_date_str") or "", get_meta(conn, "sync_doc_id") or "")
+        if (date_str, doc_id) > current:
+            set_meta(conn, "sync_date_str", date_str)
+            set_meta(conn, "sync_doc_id", doc_id)
+
+    def _build_query(self, date_str, doc_id):
+        query = (
+            self.db.collection(self.collection)
+            .select(SYNC_FIELDS)
+            .order_by("date_str")
+            .order_by(DOCUMENT_ID)
+        )
+        if doc_id:
+            # 從上次最後一篇之後接著抓
+            last_ref = self.db.collection(self.collection).document(doc_id)
+            return query.start_after({"date_str": date_str, DOCUMENT_ID: last_ref})
+        # 還沒有 doc_id (第一次同步)：沿用歸檔的規則，抓最後日期之後的文件
+        return query.where("date_str", ">", date_str)
+
+    def start_in_background(self, connect):
+        """
+        在背景執行緒呼叫 connect() 取得 Firestore client (import firebase_admin 很慢)，
+        連上後開始監聽。同一個同步器只會啟動一次，呼叫端不用等。
+        """
+        if self._started:
+            return None
+        self._started = True
+
+        def run():
+            try:
+                db = connect()
+            except Exception as e:
+                print(f"❌ Firebase 連線失敗: {e}")
+                db = None
+            if db is None:
+                self.unavailable = True
+                return
+            self.db = db
+            # 先用增量同步 (只選需要的欄位) 補到最新，監聽器只需要看之後的新文件
+            self.sync(force=True)
+            self.start_listener()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def sync_in_background(self):
+        """在背景執行緒同步，呼叫端不用等 Firebase 回應 (冷啟動時先用快照畫畫面)"""
+        thread = threading.Thread(target=self.sync, kwargs={"force": True}, daemon=True)
+        thread.start()
+        return thread
+
+    def sync(self, force=False):
+        """
+        抓取 watermark 之後的新文件並寫進資料庫，回傳新增筆數。
+        有其他使用者正在同步、或距離上次同步太近時直接跳過。
+        """
+        if self.db is None:
+            return 0
+        if not force and time.time() - self.last_synced < self.interval:
+            return 0
+        if not self._lock.acquire(blocking=False):
+            return 0
+
+        try:
+            date_str, doc_id = self.watermark()
+            print(f"📡 [Firebase] 增量同步：從 ({date_str}, {doc_id or '-'}) 之後開始...")
+
+            new_data = []
+            for doc in self._build_query(date_str, doc_id).stream():
+                record = doc.to_dict()
+                record['doc_id'] = doc.id
+                new_data.append(record)
+                date_str, doc_id = record.get('date_str', date_str), doc.id
+
+            if new_data:
+                with open_store(self.db_path) as conn:
+                    upsert_articles(conn, new_data)
+                    self._save_watermark(conn, date_str, doc_id)
+                self.version += 1
+            print(f"✅ [Firebase] 抓到新資料: {len(new_data)} 筆")
+
+            self.last_synced = time.time()
+            return len(new_data)
+        except Exception as e:
+            print(f"❌ Firebase 讀取錯誤: {e}")
+            return 0
+        finally:
+            self._lock.release()
+
+    @property
+    def listening(self):
+        return self._watch is not None and getattr(self._watch, "is_active", True)
+
+    def is_stale(self):
+        return time.time() - self.last_synced >= self.interval
+
+    def start_listener(self):
+        """
+        用 Firestore on_snapshot 監聽 watermark 之後的文件。
+        新增/修改/刪除會由 Firebase 在背景執行緒推送過來，直接套用到本地資料庫，
+        使用者的請求不用等 Firebase。(也可以搭配 FIRESTORE_EMULATOR_HOST 使用本地模擬器)
+        監聽器第一次回傳的快照會包含所有符合條件的文件，所以條件用完整的 watermark 時間
+        (不是整天)，先 sync() 補到最新再監聽，每次啟動只會重讀最後那一分鐘的幾篇。
+        """
+        if self.listening:
+            return True
+        if self.db is None:
+            return False
+
+        date_str, _ = self.watermark()
+        try:
+            query = self.db.collection(self.collection).where("date_str", ">=", date_str)
+            self._watch = query.on_snapshot(self._on_snapshot)
+            self._anchor_day = date_str[:10]
+            print(f"👂 [Firebase] 開始監聽 {date_str} 之後的新聞")
+            return True
+        except Exception as e:
+            print(f"❌ 無法啟動 Firebase 監聽，改用輪詢: {e}")
+            self._watch = None
+            return False
+
+    def stop_listener(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+    def _reanchor(self):
+        """
+        從目前的 watermark 重新掛監聽器。
+        監聽器會一直記住開始之後的所有文件 (每次 callback 都帶著整份、重連時也可能全部重讀)，
+        所以每天換一次起點，讓它只保留最近的文件。
+        """
+        try:
+            self.stop_listener()
+            self.start_listener()
+        finally:
+            self._reanchoring = False
+
+    def _on_snapshot(self, docs, changes, read_time):
+        """監聽器的 callback：只處理有變動的文件"""
+        upserts, removed = [], []
+        for change in changes:
+            doc = change.document
+            if change.type.name == "REMOVED":
+                removed.append(doc.id)
+            else:
+                record = doc.to_dict()
+                record['doc_id'] = doc.id
+                upserts.append(record)
+
+        if not upserts and not removed:
+            return
+
+        try:
+            with self._lock:
+                with open_store(self.db_path) as conn:
+                    if upserts:
+                        upsert_articles(conn, upserts)
+                        latest = max(upserts, key=lambda r: (r.get('date_str') or "", r['doc_id']))
+                        self._save_watermark(conn, latest.get('date_str') or "", latest['doc_id'])
+                    if removed:
+                        delete_articles(conn, removed)
+                self.version += 1
+                self.last_synced = time.time()
+            print(f"🔔 [Firebase] 即時更新：新增/修改 {len(upserts)} 筆，刪除 {len(removed)} 筆")
+
+            # watermark 已經到了新的一天：在另一個執行緒重新掛監聽器 (不能在 callback 裡取消自己)
+            if upserts and not self._reanchoring and self._anchor_day:
+                if (latest.get('date_str') or "")[:10] > self._anchor_day:
+                    self._reanchoring = True
+                    threading.Thread(target=self._reanchor, daemon=True).start()
+        except Exception as e:
+            print(f"❌ 套用即時更新失敗: {e}")
@@ -3,11 +3,37 @@ from firebase_admin import credentials, firestore, initialize_app
 import json
 import os
 import hashlib
+from News_content import compress_text
 
 # --- 設定區 ---
 JSON_FILE = "cleaned_news.json"
 KEY_FILE = "serviceAccountKey.json" 
 COLLECTION_NAME = "news"
+# 內文另外存 (zstd 壓縮)，news 文件只放 metadata，儀表板讀取時不會帶到內文
+CONTENT_COLLECTION = "news_content"
+# 爬蟲在列表頁找到的數量 (News_crawler.py 產生)，上傳後給 check_count.py 比對
+CRAWL_STATS_FILE = "crawl_stats.json"
+STATS_COLLECTION = "crawl_stats"
+
+def upload_crawl_stats(db):
+    if not os.path.exists(CRAWL_STATS_FILE):
+        return
+
+    with open(CRAWL_STATS_FILE, 'r', encoding='utf-8') as f:
+        stats = json.load(f)
+
+    # 每天一份文件，只有幾筆寫入
+    batch = db.batch()
+    for date, counts in stats.items():
+        doc_ref = db.collection(STATS_COLLECTION).document(date)
+        batch.set(doc_ref, {
+            "date": date,
+            "categories": counts,
+            "total": sum(counts.values()),
+            "updated_at": firestore.SERVER_TIMESTAMP,
+        })
+    batch.commit()
+    print(f"🧾 已上傳 {len(stats)} 天的列表統計到 {STATS_COLLECTION}")
 
 def upload_to_firebase():
     # 1. 檢查金鑰是否存在
@@ -49,7 +75,8 @@ def upload_to_firebase():
     
     # 4. 批次寫入 (Batch Write)
     # Firestore 一個 Batch 最多只能有 500 個操作，所以我們要分批切塊
-    batch_size = 400 
+    # 每篇新聞會寫 2 份文件 (metadata + 內文)，所以一批 200 篇
+    batch_size = 200 
     total_batches = (len(news_list) // batch_size) + 1
     
     for i in range(0, len(news_list), batch_size):
@@ -66,13 +93,26 @@ def upload_to_firebase():
                 doc_id = hashlib.md5(link.encode('utf-8')).hexdigest()
                 
                 # 3. 指定 ID 寫入 (如果有重複的 ID，就會變成更新，不會新增)
+                # metadata 與內文分開：內文壓縮後存到另一個 collection
+                content = news.get('content')
+                metadata = {k: v for k, v in news.items() if k != 'content'}
+
                 doc_ref = db.collection(COLLECTION_NAME).document(doc_id)
-                batch.set(doc_ref, news)
+                batch.set(doc_ref, metadata)
+
+                if content:
+                    content_ref = db.collection(CONTENT_COLLECTION).document(doc_id)
+                    batch.set(content_ref, {
+                        "date_str": news.get('date_str'),
+                        "content_zst": compress_text(content),
+                    })
             
         # 提交這一個批次
         batch.commit()
         print(f"   ✅ 已寫入第 {i//batch_size + 1}/{total_batches} 批 (本批 {len(chunk)} 筆)")
 
+    upload_crawl_stats(db)
+
     print("🎉 上傳完畢！請去 Firebase Console 檢查資料。")
 
 if __name__ == "__main__":
@@ -1,101 +1,150 @@
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, firestore
 import pandas as pd
-import plotly.express as px
 import os
+import gzip
+import shutil
+import math
+import tempfile
 from datetime import datetime, timedelta
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-import ast
-import numpy as np
+from News_store import (
+    DB_FILE, SCHEMA_VERSION, ArticleFilter, open_store, upsert_articles, get_meta, set_meta,
+    count_all, read_manifest,
+    count_articles, distinct_values, count_distinct_categories, top_reporter,
+    category_counts, daily_counts, reporter_counts, reporter_category_counts,
+    daily_reporter_counts, keyword_frequencies, fetch_article_page,
+)
+from News_sync import FirestoreSync
+
+# 冷啟動加速：plotly / wordcloud / matplotlib / firebase_admin 都很重，
+# 等到真正用到的地方才 import，第一個畫面可以直接從資料庫快照畫出來。
 
 
 # --- 1. 初始化 Firebase (只執行一次) ---
-# Streamlit 會在每次互動時重跑整個腳本，所以要檢查是否已經初始化
-if not firebase_admin._apps:
-    # 1. 優先嘗試從 Streamlit Secrets 讀取 (雲端模式)
-    if "firebase" in st.secrets:
-        # 這裡的 "firebase" 對應到 Secrets 裡面的 [firebase]
-        key_dict = dict(st.secrets["firebase"])
-        
-        if "\\n" in key_dict["private_key"]:
-            key_dict["private_key"] = key_dict["private_key"].replace("\\n", "\n")
-        
-        cred = credentials.Certificate(key_dict)
-    
-    # 2. 如果沒有環境變數，則嘗試讀取本地檔案 (給你自己開發用)
-    elif os.path.exists("serviceAccountKey.json"):
-        cred = credentials.Certificate("serviceAccountKey.json")
-    
-    else:
-        st.error("找不到 Firebase 金鑰！")
-        st.stop()
+# 只由同步器的背景執行緒呼叫一次 (見 get_syncer)，第一個畫面不用等 firebase_admin 載入與連線
+def get_firestore():
+    import firebase_admin
+    from firebase_admin import credentials, firestore
 
-    firebase_admin.initialize_app(cred)
+    if not firebase_admin._apps:
+        # 1. 優先嘗試從 Streamlit Secrets 讀取 (雲端模式)
+        if "firebase" in st.secrets:
+            # 這裡的 "firebase" 對應到 Secrets 裡面的 [firebase]
+            key_dict = dict(st.secrets["firebase"])
 
-db = firestore.client()
+            if "\\n" in key_dict["private_key"]:
+                key_dict["private_key"] = key_dict["private_key"].replace("\\n", "\n")
 
-# --- 2. 資料讀取與快取 (Cache) ---
-# 使用 @st.cache_data 避免每次按按鈕都重新去 Firebase 撈資料 (省流量、加速)
-@st.cache_data(ttl=600) 
-def load_hybrid_data():
-    """
-    1. 讀取 GitHub 上的 CSV (歷史資料)
-    2. 讀取 Firebase (最新資料)
-    3. 合併回傳
-    """
-    # --- Part A: 讀取歷史 CSV (本地檔案) ---
-    csv_file = "news_history.csv"
-    
-    if os.path.exists(csv_file):
-        try:
-            history_df = pd.read_csv(csv_file)
-            # 確保日期欄位是 datetime 物件，方便後面比較
-            history_df['date_obj'] = pd.to_datetime(history_df['date_str'])
-            last_date_in_csv = history_df['date_str'].max()
-            print(f"📂 [CSV] 載入歷史資料: {len(history_df)} 筆 (更新至 {last_date_in_csv})")
-        except Exception as e:
-            print(f"❌ 讀取 CSV 失敗: {e}")
-            history_df = pd.DataFrame()
-            last_date_in_csv = "2025-11-01" # 預設起點
-    else:
-        print("⚠️ 找不到 CSV 檔案，將只抓取 Firebase 資料")
-        history_df = pd.DataFrame()
-        last_date_in_csv = "2025-11-01"
+            cred = credentials.Certificate(key_dict)
+
+        # 2. 如果沒有環境變數，則嘗試讀取本地檔案 (給你自己開發用)
+        elif os.path.exists("serviceAccountKey.json"):
+            cred = credentials.Certificate("serviceAccountKey.json")
+
+        else:
+            # 沒有金鑰時仍然可以瀏覽歸檔資料，只是沒有即時新聞
+            print("❌ 找不到 Firebase 金鑰！只顯示歸檔資料")
+            return None
+
+        firebase_admin.initialize_app(cred)
+
+    return firestore.client()
+
+# --- 2. 資料庫準備與同步 ---
+# 分析用的 SQLite 資料庫由歸檔 Action 建好，壓縮後放在 GitHub Release (不進 Git)；
+# App 啟動時下載到暫存區直接打開，不必再解析整份 CSV。Firebase 的新資料只寫進這份副本。
+CSV_FILE = "news_history.csv"
+RUNTIME_DB = os.path.join(tempfile.gettempdir(), "ettoday_dashboard.db")
+# 私有 repo 的 Release 需要驗證時，可以用環境變數指定其他下載網址
+SNAPSHOT_URL_ENV = "SNAPSHOT_URL"
+
+def archived_at_of(path):
+    with open_store(path) as conn:
+        return get_meta(conn, "archived_at") if count_all(conn) else None
+
+def replace_runtime_db(src):
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(RUNTIME_DB + suffix):
+            os.remove(RUNTIME_DB + suffix)
+    os.replace(src, RUNTIME_DB)
+
+def load_snapshot(manifest):
+    """把歸檔快照放到 RUNTIME_DB，成功回傳 True"""
+    archived_at = manifest.get("archived_at")
+    tmp_path = RUNTIME_DB + ".download"
+
+    # 本地開發：自己跑過 update_csv.py 的話，直接用那份資料庫
+    local_archived_at = archived_at_of(DB_FILE) if os.path.exists(DB_FILE) else None
+    if local_archived_at and (archived_at is None or local_archived_at == archived_at):
+        shutil.copyfile(DB_FILE, tmp_path)
+        replace_runtime_db(tmp_path)
+        print(f"🗄️ [DB] 載入本地歸檔資料庫 (歸檔時間 {local_archived_at})")
+        return True
+
+    url = os.environ.get(SNAPSHOT_URL_ENV) or manifest.get("url")
+    if not url or manifest.get("schema_version") != SCHEMA_VERSION:
+        return False
 
-    # --- Part B: 抓取 Firebase 新資料 ---
-    # 只抓 CSV 最後一天 "之後" 的資料
-    print(f"📡 [Firebase] 正在檢查 {last_date_in_csv} 之後的新聞...")
-    
     try:
-        docs = (
-            db.collection("news")
-            .where("date_str", ">", last_date_in_csv)
-            .stream()
-        )
-        new_data = [doc.to_dict() for doc in docs]
-        print(f"✅ [Firebase] 抓到新資料: {len(new_data)} 筆")
+        import urllib.request
+        with urllib.request.urlopen(url, timeout=60) as resp, open(tmp_path, 'wb') as f:
+            # 一邊下載一邊解壓縮，不用先把整個檔案放進記憶體
+            shutil.copyfileobj(gzip.GzipFile(fileobj=resp), f)
     except Exception as e:
-        print(f"❌ Firebase 讀取錯誤: {e}")
-        new_data = []
+        print(f"❌ 下載資料庫快照失敗: {e}")
+        return False
 
-    # --- Part C: 合併 ---
-    if new_data:
-        new_df = pd.DataFrame(new_data)
-        new_df['date_obj'] = pd.to_datetime(new_df['date_str'])
-        
-        # 把舊的跟新的接起來
-        if not history_df.empty:
-            full_df = pd.concat([history_df, new_df], ignore_index=True)
-        else:
-            full_df = new_df
-            
-        # 雙重保險：依連結去重複 (防止 CSV 跟 Firebase 重疊)
-        full_df = full_df.drop_duplicates(subset=['link'], keep='last')
-        return full_df
-    else:
-        return history_df
+    replace_runtime_db(tmp_path)
+    print(f"🗄️ [DB] 已下載歸檔快照 (歸檔時間 {archived_at})")
+    return True
+
+@st.cache_resource
+def prepare_store():
+    """
+    每個程序只執行一次：準備可寫入的資料庫，回傳路徑。
+    暫存區的副本跟最新的快照同一個歸檔時間 (例如只是程序重開) 就直接沿用，連同已經同步的 Firebase 資料；
+    否則載入快照。下載不到快照時才退回由 CSV 匯入。
+    """
+    manifest = read_manifest() or {}
+    archived_at = manifest.get("archived_at")
+    runtime_archived_at = archived_at_of(RUNTIME_DB) if os.path.exists(RUNTIME_DB) else None
+
+    needs_snapshot = runtime_archived_at is None or (archived_at and archived_at != runtime_archived_at)
+    if needs_snapshot and not load_snapshot(manifest) and os.path.exists(CSV_FILE):
+        print(f"⚠️ 找不到資料庫快照，改由 {CSV_FILE} 建立")
+        csv_db_path = RUNTIME_DB + ".csv"
+        if os.path.exists(csv_db_path):
+            os.remove(csv_db_path)
+        with open_store(csv_db_path) as conn:
+            upsert_articles(conn, pd.read_csv(CSV_FILE))
+            set_meta(conn, "archived_at", archived_at or "csv")
+            conn.commit()
+            conn.execute("ANALYZE")
+        replace_runtime_db(csv_db_path)
+
+    # WAL 模式：背景監聽器寫入時，其他使用者仍然可以同時讀取
+    with open_store(RUNTIME_DB) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+
+    return RUNTIME_DB
+
+# Firebase 同步器：整個程序共用一個 (所有使用者、所有 session)。
+# 這裡只建立物件，不碰 Firebase；指標卡畫出來之後才在背景連線並掛上 on_snapshot 監聽器，
+# 新文件由 Firebase 推送、在背景寫進資料庫
+@st.cache_resource
+def get_syncer(db_path):
+    return FirestoreSync(None, db_path)
+
+# 查詢結果依「資料版本」快取：監聽器每套用一次更新，version 就會改變，
+# 統計與圖表只在資料真的變動後重算一次，之後的互動都直接拿快取
+@st.cache_data(max_entries=512, show_spinner=False)
+def cached_query(query_name, flt, version, _query_fn, *args):
+    # 每次查詢開一個連線 (SQLite 開連線很便宜，也不會有跨執行緒的問題)
+    with open_store(db_path) as conn:
+        return _query_fn(conn, flt, *args)
+
+def run_query(query_fn, flt, *args):
+    """執行 News_store 的查詢，並帶上目前的資料版本當作快取 key"""
+    return cached_query(query_fn.__name__, flt, syncer.version, query_fn, *args)
 
 # --- 3. 介面開始 ---
 st.set_page_config(
@@ -126,6 +175,13 @@ with st.sidebar:
         max_value=datetime.now().date()
     )
 
+    # 近似重複新聞 (同一則新聞以不同網址/類別重複刊登) 只算一次
+    collapse_dups = st.toggle(
+        "🧬 合併近似重複新聞",
+        value=True,
+        help="依內文 SimHash 分群，同一群組只保留一篇"
+    )
+
     if len(date_range) == 2:
         start_date, end_date = date_range
         
@@ -135,23 +191,21 @@ with st.sidebar:
         st.stop() # 這裡停住，等待使用者選完日期
 
 # ==========================================
-# 2. 核心動作：載入資料
+# 2. 核心動作：準備資料庫
 # ==========================================
-# 步驟 1: 先拿到 "完整資料庫" (這步有快取保護)
-full_df = load_hybrid_data()
-
-# 步驟 2: 根據使用者選的日期，在 "記憶體中" 切割資料
-if not full_df.empty:
-    # 這裡要做日期過濾，因為 load_hybrid_data 現在回傳的是從 11月 至今的所有資料
-    # 我們要把 start_date, end_date 轉成 datetime 才能跟 date_obj 比較
-    mask = (full_df['date_obj'].dt.date >= start_date) & (full_df['date_obj'].dt.date <= end_date)
-    df = full_df[mask]
-else:
-    df = pd.DataFrame()
-
-# 防呆：如果 df 是空的
-if df.empty:
+# 步驟 1: 準備本地資料庫；Firebase 新資料由背景監聽器即時寫入 (連線在指標卡之後才開始)
+db_path = prepare_store()
+syncer = get_syncer(db_path)
+
+# 步驟 2: 日期篩選交給 SQL (走 date_str 索引)，不把整個資料庫載入記憶體
+range_filter = ArticleFilter(start_date, end_date, collapse_dups=collapse_dups)
+total_count = run_query(count_articles, range_filter)
+
+# 防呆：如果區間內沒有資料
+if total_count == 0:
     st.warning(f"⚠️ 在 {start_date} 到 {end_date} 之間找不到新聞資料。")
+    # 區間內還沒有資料時也要開始同步，新資料才進得來
+    syncer.start_in_background(get_firestore)
     st.stop()
 # ==========================================
 # 3. 側邊欄 Part B：類別與記者篩選
@@ -161,7 +215,7 @@ with st.sidebar:
     st.write("---")
     st.write("🏷️ 新聞類別篩選")
     
-    all_categories = sorted(df['category'].unique())
+    all_categories = run_query(distinct_values, range_filter, 'category')
     
     if "selected_cats" not in st.session_state:
         st.session_state["selected_cats"] = all_categories
@@ -188,7 +242,7 @@ with st.sidebar:
     st.write("---")
     st.write("🎤 記者篩選")
     
-    all_reporters = sorted(df['reporter'].astype(str).unique())
+    all_reporters = run_query(distinct_values, range_filter, 'reporter')
     
     selected_reporters = st.multiselect(
         "搜尋或選擇記者 (留空即顯示全部)：",
@@ -197,13 +251,10 @@ with st.sidebar:
     )
     
     # --- 計算過濾後的結果 (給 Metric 使用) ---
-    mask = df['category'].isin(selected_cats)
+    # 類別 + 記者條件也一起交給 SQL
+    flt = ArticleFilter(start_date, end_date, selected_cats, selected_reporters, collapse_dups)
     
-    if selected_reporters:
-        mask = mask & (df['reporter'].isin(selected_reporters))
-            
-    filtered_count = df[mask].shape[0]
-    total_count = df.shape[0]
+    filtered_count = run_query(count_articles, flt)
 
     # --- 顯示指標卡 ---
     st.markdown("---")
@@ -215,85 +266,63 @@ with st.sidebar:
     )
     st.caption("資料來源：ETtoday")
 
-# ==========================================
-# 4. 主畫面資料過濾 (產生全域 filtered_df 給圖表用)
-# ==========================================
-mask = df['category'].isin(selected_cats)
-
-if selected_reporters:
-    mask = mask & (df['reporter'].isin(selected_reporters))
-
-filtered_df = df[mask]
-
 # === 關鍵指標區 (KPI Metrics) ===
 col1, col2, col3, col4 = st.columns(4)
 with col1:
-    st.metric("總文章數", f"{len(filtered_df)} 篇")
+    st.metric("總文章數", f"{filtered_count} 篇")
 with col2:
-    # 算出最活躍記者
-    valid_reporters = filtered_df[filtered_df['reporter'] != 'Unknown']
-
-    if not valid_reporters.empty:
-        top_reporter = valid_reporters['reporter'].mode()[0]
-    else:
-        top_reporter = "N/A"
-    st.metric("🔥 最活躍記者", top_reporter)
+    # 算出最活躍記者 (SQL 直接 GROUP BY)
+    top = run_query(top_reporter, flt)
+    st.metric("🔥 最活躍記者", top or "N/A")
 with col3:
-    st.metric("涵蓋類別數", f"{filtered_df['category'].nunique()} 類")
+    st.metric("涵蓋類別數", f"{run_query(count_distinct_categories, flt)} 類")
 with col4:
     st.metric("⭐ 關鍵詞焦點", "請看下方分析")
 
 st.markdown("---")
 
+# 第一個畫面 (指標卡) 已經送出，這時才在背景連線 Firebase (整個程序只會啟動一次)
+syncer.start_in_background(get_firestore)
+if syncer.unavailable:
+    st.sidebar.error("找不到 Firebase 金鑰！目前只顯示歸檔資料。")
+elif syncer.db is not None and not syncer.listening and syncer.is_stale():
+    # 監聽器沒有在運作 (例如連線中斷)：退回輪詢，但一樣丟到背景，不讓使用者等
+    syncer.sync_in_background()
+
 # === 主內容分頁 ===
 tab1, tab2, tab3, tab4 = st.tabs(["📈 趨勢總覽", "☁️ 關鍵詞雲", "🏆 記者戰力榜", "📊 戰力分析與資料庫"])
 
 with tab1:
+    # 圖表套件只在用到的分頁裡載入
+    import plotly.express as px
+
     col_a, col_b = st.columns([2, 1])
     with col_a:
         st.subheader("各類別新聞數量佔比")
-        cat_counts = filtered_df['category'].value_counts().reset_index()
+        cat_counts = run_query(category_counts, flt)
         cat_counts.columns = ['類別', '數量']
         fig_pie = px.pie(cat_counts, values='數量', names='類別', hole=0.4) # 甜甜圈圖比較潮
         st.plotly_chart(fig_pie, use_container_width=True)
     with col_b:
         st.subheader("每日文章量趨勢")
         # 依日期分組統計
-        daily_counts = filtered_df.groupby(filtered_df['date_obj'].dt.date).size().reset_index(name='文章數')
-        fig_line = px.line(daily_counts, x='date_obj', y='文章數', markers=True)
+        daily = run_query(daily_counts, flt)
+        daily['date'] = pd.to_datetime(daily['date'])
+        daily.columns = ['date_obj', '文章數']
+        fig_line = px.line(daily, x='date_obj', y='文章數', markers=True)
         st.plotly_chart(fig_line, use_container_width=True)
 
 with tab2:
     st.subheader("熱門關鍵詞文字雲")
-    # 這裡需要把所有 keywords 串接起來
-    all_words = []
-    if 'keywords' in filtered_df.columns:
-        for k in filtered_df['keywords']:
-            if k is None:
-                continue
-                
-            # 狀況 1: 它是 list (從 Firebase 直接來)
-            if isinstance(k, list):
-                all_words.extend(k)
+    # 關鍵詞在資料庫裡展開並統計好，只拿回詞頻
+    word_freqs = run_query(keyword_frequencies, flt)
                 
-            # 狀況 2: 它是 string (從 CSV 讀取，格式像 "['a', 'b']")
-            elif isinstance(k, str):
-                try:
-                    # 嘗試解析字串列表
-                    parsed = ast.literal_eval(k)
-                    if isinstance(parsed, list):
-                        all_words.extend(parsed)
-                    else:
-                        all_words.append(k) # 解析出來不是 list，就當單字
-                except:
-                    # 解析失敗，就直接當作一個單字
-                    all_words.append(k)
-    else:
-        st.error("資料中找不到 'keywords' 欄位，請檢查爬蟲資料")
-        
-    if all_words:
-        text = " ".join(all_words)
-        
+    if word_freqs:
+        # 文字雲相關套件只在這個分頁用到
+        from wordcloud import WordCloud
+        import matplotlib.pyplot as plt
+        import numpy as np
+
         # 建立一個 800x800 的網格
         x, y = np.ogrid[:800, :800]
         # 計算圓心距離 (中心點 400, 400，半徑 380)
@@ -303,7 +332,6 @@ with tab2:
         # 設定字型檔名
         font_path = "NotoSansTC-VariableFont_wght.ttf" 
         
-        import os
         if not os.path.exists(font_path):
             st.warning("⚠️ 警告：找不到中文字型檔，文字雲可能顯示為方塊。請上傳 .otf/.ttf 檔案。")
             use_font = None # 使用預設
@@ -312,7 +340,7 @@ with tab2:
 
         # 建立文字雲物件，並指定 font_path
         wc = WordCloud(
-            font_path=font_path,
+            font_path=use_font,
             background_color="white",
             mask=mask, 
             max_words=100, 
@@ -323,7 +351,7 @@ with tab2:
             contour_width=0,          
             width=800,
             height=800,
-        ).generate(text)
+        ).generate_from_frequencies(word_freqs)
 
         col_L, col_Main, col_R = st.columns([1, 2, 1]) 
         
@@ -337,12 +365,13 @@ with tab2:
         st.info("無關鍵詞資料")
 
 with tab3:
+    import plotly.express as px
+
     st.subheader("記者產量 Top 20")
-    reporter_counts = filtered_df['reporter'].value_counts().head(20).reset_index()
-    reporter_counts.columns = ['記者', '文章數']
-    reporter_counts = reporter_counts[reporter_counts['記者'] != 'Unknown']
+    reporter_top = run_query(reporter_counts, flt, 20)
+    reporter_top.columns = ['記者', '文章數']
     
-    fig_bar = px.bar(reporter_counts, x='文章數', y='記者', orientation='h', color='文章數')
+    fig_bar = px.bar(reporter_top, x='文章數', y='記者', orientation='h', color='文章數')
     fig_bar.update_layout(yaxis={'categoryorder':'total ascending'}) # 讓長條圖由大排到小
     st.plotly_chart(fig_bar, use_container_width=True)
 
@@ -351,11 +380,13 @@ with tab4:
     if selected_reporters:
         st.subheader(f"📊 記者戰力分析：{'、'.join(selected_reporters)}")
         
-        if not filtered_df.empty:
+        if filtered_count > 0:
+            import plotly.express as px
+
             sub_t1, sub_t2 = st.tabs(["📊 領域分布", "📈 發文趨勢"])
             
             with sub_t1:
-                reporter_stats = filtered_df.groupby(['reporter', 'category']).size().reset_index(name='count')
+                reporter_stats = run_query(reporter_category_counts, flt)
                 fig_cat = px.bar(
                     reporter_stats, x="reporter", y="count", color="category",
                     title="發稿領域分布", text="count",
@@ -364,8 +395,8 @@ with tab4:
                 st.plotly_chart(fig_cat, use_container_width=True)
 
             with sub_t2:
-                daily_stats = filtered_df.groupby([filtered_df['date_obj'].dt.date, 'reporter']).size().reset_index(name='count')
-                daily_stats.columns = ['date', 'reporter', 'count']
+                daily_stats = run_query(daily_reporter_counts, flt)
+                daily_stats['date'] = pd.to_datetime(daily_stats['date'])
                 fig_trend = px.line(
                     daily_stats, x='date', y='count', color='reporter', markers=True,
                     title="每日發文數量走勢",
@@ -377,10 +408,33 @@ with tab4:
         else:
             st.warning("⚠️ 該記者在此篩選條件下無發文紀錄。")
 
-    st.subheader(f"📝 詳細文章列表 (共 {len(filtered_df)} 筆)")
+    st.subheader(f"📝 詳細文章列表 (共 {filtered_count} 筆)")
     
+    # 只把目前這一頁送到瀏覽器；排序與翻頁都在資料庫做 (keyset 分頁)
+    SORT_LABELS = {"date_str": "發布時間", "category": "分類", "reporter": "記者", "title": "標題"}
+    col_sort, col_order, col_size = st.columns(3)
+    with col_sort:
+        sort_column = st.selectbox("排序欄位", options=list(SORT_LABELS), format_func=SORT_LABELS.get)
+    with col_order:
+        descending = st.toggle("由大到小 (新到舊)", value=True)
+    with col_size:
+        page_size = st.selectbox("每頁筆數", options=[25, 50, 100], index=1)
+
+    # 篩選或排序條件改變時，回到第一頁
+    page_key = (start_date, end_date, tuple(selected_cats), tuple(selected_reporters),
+                collapse_dups, sort_column, descending, page_size)
+    if st.session_state.get("page_key") != page_key:
+        st.session_state["page_key"] = page_key
+        # 每一頁的起始游標 (第一頁是 None)
+        st.session_state["page_cursors"] = [None]
+
+    page_cursors = st.session_state["page_cursors"]
+    page_df, next_cursor = run_query(
+        fetch_article_page, flt, sort_column, descending, page_size, page_cursors[-1], filtered_count
+    )
+
     st.dataframe(
-        filtered_df[['date_str', 'category', 'reporter', 'title', 'link']],
+        page_df,
         column_config={
             "link": st.column_config.LinkColumn("閱讀全文", display_text="點擊前往"),
             "date_str": "發布時間",
@@ -390,4 +444,19 @@ with tab4:
         },
         use_container_width=True,
         hide_index=True
-    )
\ No newline at end of file
+    )
+
+    def prev_page():
+        st.session_state["page_cursors"].pop()
+
+    def next_page(cursor):
+        st.session_state["page_cursors"].append(cursor)
+
+    total_pages = max(1, math.ceil(filtered_count / page_size))
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        st.button("⬅️ 上一頁", on_click=prev_page, disabled=len(page_cursors) <= 1, use_container_width=True)
+    with col_info:
+        st.caption(f"第 {len(page_cursors)} / {total_pages} 頁")
+    with col_next:
+        st.button("下一頁 ➡️", on_click=next_page, args=(next_cursor,), disabled=next_cursor is None, use_container_width=True)
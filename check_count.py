@@ -1,18 +1,136 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 import firebase_admin
 from firebase_admin import credentials, firestore
 
+# --- 設定區 ---
+# 本地統計目錄：每天 x 類別在 Firestore 裡有幾篇
+CATALOG_FILE = "stats_catalog.json"
+# 每次只重新計算最近幾天 (更早的日期不會再變動，直接沿用目錄)
+RECENT_DAYS = 3
+# 同時送出的 count 查詢數
+MAX_WORKERS = 8
+COLLECTION_NAME = "news"
+STATS_COLLECTION = "crawl_stats"
+
 if not firebase_admin._apps:
     cred = credentials.Certificate("serviceAccountKey.json")
     firebase_admin.initialize_app(cred)
 
 db = firestore.client()
 
-# 🔥 使用 count() 查詢，叫 Firebase 算總數
-collection_ref = db.collection("news")
-count_query = collection_ref.count()
 
-# 取得結果
-aggregates = count_query.get()
-total_count = aggregates[0][0].value
+def load_catalog():
+    if os.path.exists(CATALOG_FILE):
+        with open(CATALOG_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {"updated_at": None, "dates": {}}
+
+
+def save_catalog(catalog):
+    catalog["updated_at"] = datetime.now(timezone.utc).isoformat()
+    with open(CATALOG_FILE, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def recent_dates(days=RECENT_DAYS):
+    """以台灣時間為準的最近幾天 ("2025-12-16" 格式)"""
+    today = datetime.now(timezone(timedelta(hours=8))).date()
+    return [(today - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+
+
+def count_partition(date, category=None):
+    """
+    用 count() 聚合查詢算一個分區 (某天，或某天 x 某類別) 的文章數，不讀取任何文件。
+    date_str 格式是 "2025/12/16 10:30"，所以用字串區間篩選當天。
+    註：category + date_str 的查詢需要 Firestore 複合索引 (第一次執行時錯誤訊息會附上建立連結)。
+    """
+    start = date.replace("-", "/")
+    end = (datetime.strptime(date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y/%m/%d")
+
+    query = (
+        db.collection(COLLECTION_NAME)
+        .where("date_str", ">=", start)
+        .where("date_str", "<", end)
+    )
+    if category is not None:
+        query = query.where("category", "==", category)
+
+    aggregates = query.count().get()
+    return aggregates[0][0].value
+
+
+def load_crawl_stats(dates):
+    """讀取爬蟲記錄的列表數量 (每天一份文件)"""
+    refs = [db.collection(STATS_COLLECTION).document(date) for date in dates]
+    stats = {}
+    for snapshot in db.get_all(refs):
+        if snapshot.exists:
+            stats[snapshot.id] = snapshot.to_dict().get("categories", {})
+    return stats
+
+
+def refresh_catalog(catalog, dates, crawl_stats):
+    """併發重新計算最近幾天每個分區的數量，寫回目錄"""
+    tasks = []
+    for date in dates:
+        # 要計算的類別：爬蟲看過的 + 目錄裡原本就有的
+        categories = set(crawl_stats.get(date, {}))
+        categories |= set(catalog["dates"].get(date, {}).get("categories", {}))
+        tasks.append((date, None))
+        tasks.extend((date, category) for category in sorted(categories))
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        results = list(pool.map(lambda task: count_partition(*task), tasks))
+
+    for (date, category), count in zip(tasks, results):
+        entry = catalog["dates"].setdefault(date, {"total": 0, "categories": {}})
+        if category is None:
+            entry["total"] = count
+        else:
+            entry["categories"][category] = count
+
+
+def report(catalog, dates, crawl_stats):
+    """比對資料庫數量與爬蟲在列表頁找到的數量，列出可能漏抓的分區"""
+    missing_total = 0
+    for date in sorted(dates):
+        entry = catalog["dates"].get(date, {"total": 0, "categories": {}})
+        discovered = crawl_stats.get(date)
+        print(f"\n📅 {date}：資料庫 {entry['total']} 筆" + (f" / 列表 {sum(discovered.values())} 筆" if discovered else " (無爬蟲記錄)"))
+
+        if not discovered:
+            continue
+        for category in sorted(set(discovered) | set(entry["categories"])):
+            stored = entry["categories"].get(category, 0)
+            found = discovered.get(category, 0)
+            gap = found - stored
+            mark = "⚠️" if gap > 0 else "✅"
+            print(f"   {mark} {category}: {stored} / {found}" + (f" (缺 {gap} 筆)" if gap > 0 else ""))
+            missing_total += max(gap, 0)
+
+    print(f"\n🔎 最近 {len(dates)} 天共缺少 {missing_total} 筆")
+
+
+def main():
+    # 🔥 使用 count() 查詢，叫 Firebase 算總數
+    aggregates = db.collection(COLLECTION_NAME).count().get()
+    total_count = aggregates[0][0].value
+    print(f"📊 目前資料庫裡的總新聞數：{total_count} 筆")
+
+    catalog = load_catalog()
+    dates = recent_dates()
+    crawl_stats = load_crawl_stats(dates)
+
+    print(f"🔄 正在更新最近 {len(dates)} 天的分區統計 ({', '.join(dates)})...")
+    refresh_catalog(catalog, dates, crawl_stats)
+    save_catalog(catalog)
+    print(f"💾 已更新統計目錄 {CATALOG_FILE}")
+
+    report(catalog, dates, crawl_stats)
+
 
-print(f"📊 目前資料庫裡的總新聞數：{total_count} 筆")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
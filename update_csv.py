@@ -3,6 +3,16 @@ import json
 import pandas as pd
 import firebase_admin
 from firebase_admin import credentials, firestore
+from News_dedup import SimHashIndex, HAMMING_THRESHOLD
+from News_keywords import KeywordModel
+from News_cleaner import STOP_WORDS
+from News_store import (
+    DB_FILE, SNAPSHOT_FILE, SNAPSHOT_TAG, MANIFEST_FILE,
+    open_store, upsert_articles, count_all, set_meta, export_snapshot,
+)
+from News_content import CONTENT_DIR, ContentStore, decompress_text
+from News_dedup import make_doc_id
+from datetime import datetime, timezone
 
 # --- 1. 智慧型連線 (本地/雲端通用) ---
 # 優先讀取環境變數 (GitHub Action 用)，如果沒有就讀本地 Key (你測試用)
@@ -22,13 +32,115 @@ if not firebase_admin._apps:
 
 db = firestore.client()
 CSV_FILE = "news_history.csv"
+# 上傳器把壓縮後的內文放在這個 collection (news 文件只有 metadata)
+CONTENT_COLLECTION = "news_content"
+
+def snapshot_url():
+    """快照在 GitHub Release 上的下載網址 (GitHub Action 裡才知道是哪個 repo)"""
+    repo = os.environ.get("GITHUB_REPOSITORY")
+    if not repo:
+        return None
+    return f"https://github.com/{repo}/releases/download/{SNAPSHOT_TAG}/{SNAPSHOT_FILE}"
+
+def save_archive(df_final, df_changed, dedup_index, keyword_model):
+    df_final.to_csv(CSV_FILE, index=False, encoding="utf-8-sig")
+    dedup_index.save()
+    keyword_model.save()
+    print(f"💾 已儲存至 {CSV_FILE}，目前總筆數: {len(df_final)} (指紋索引 {len(dedup_index)} 筆，詞頻表 {len(keyword_model)} 篇)")
+
+    # 同步更新本地分析資料庫 (儀表板的主要資料來源)
+    with open_store() as conn:
+        # 資料庫還是空的 (第一次執行，或 CI 上的乾淨環境)：整份 CSV 匯入
+        if count_all(conn) == 0:
+            df_changed = df_final
+        written = upsert_articles(conn, df_changed)
+        set_meta(conn, "archived_at", datetime.now(timezone.utc).isoformat())
+        total = count_all(conn)
+        # 這份資料庫就是儀表板冷啟動用的快照：更新查詢統計並壓實檔案
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.execute("VACUUM")
+    print(f"🗄️ 已更新 {DB_FILE}：寫入 {written} 筆，目前總筆數: {total}")
+
+    # 資料庫不進 Git：壓縮成快照交給 Action 上傳到 Release，Git 只記錄說明檔
+    manifest = export_snapshot(url=snapshot_url())
+    print(f"📦 已輸出快照 {SNAPSHOT_FILE} 與 {MANIFEST_FILE} (歸檔時間 {manifest['archived_at']})")
+
+def fetch_contents(df):
+    """
+    補上新資料的內文：舊版文件的內文還在 news 文件裡，直接用；
+    新版文件則從 news_content 一次批次讀回 (每篇 1 次讀取)。
+    """
+    contents = df['content'].tolist() if 'content' in df.columns else [None] * len(df)
+    missing = [i for i, c in enumerate(contents) if not isinstance(c, str)]
+
+    # get_all 一次不要送太多
+    chunk_size = 300
+    for start in range(0, len(missing), chunk_size):
+        rows = missing[start:start + chunk_size]
+        doc_ids = {make_doc_id(df['link'].iloc[i]): i for i in rows}
+        refs = [db.collection(CONTENT_COLLECTION).document(doc_id) for doc_id in doc_ids]
+        for snapshot in db.get_all(refs):
+            if snapshot.exists:
+                data = snapshot.to_dict().get("content_zst")
+                if data:
+                    contents[doc_ids[snapshot.id]] = decompress_text(data)
+    return contents
+
+def update_keyword_model(keyword_model, df):
+    """只用這次新增的文章更新文件頻率表"""
+    docs = keyword_model.tokenize_batch(df['title'], df['content'])
+    keyword_model.update(docs)
 
 def main():
+    # 近似重複索引 (SimHash)，由歸檔流程負責維護並 commit 回 GitHub
+    dedup_index = SimHashIndex.load()
+    # 關鍵詞用的文件頻率表 (語料庫 IDF)，同樣只做增量更新
+    keyword_model = KeywordModel.load(stop_words=STOP_WORDS)
+    # 依日期分檔的壓縮內文庫 (CSV 與資料庫都不放全文)
+    content_store = ContentStore()
+    migrated = False
+
     # --- 2. 判斷起點 ---
     if os.path.exists(CSV_FILE):
         df_old = pd.read_csv(CSV_FILE)
         last_date = df_old['date_str'].max()
         print(f"📂 讀取現有 CSV，最後資料日期: {last_date}")
+
+        needs_clusters = 'cluster_id' not in df_old.columns
+        needs_keywords = len(keyword_model) == 0
+
+        if 'content' in df_old.columns:
+            # 舊版 CSV 內含全文：搬到壓縮內文庫，CSV 之後只留 metadata
+            print(f"📦 正在把歷史內文搬到 {CONTENT_DIR}/ ...")
+            content_store.add_dataframe(df_old)
+            migrated = True
+        elif needs_clusters or needs_keywords:
+            # 需要重建索引時，從內文庫讀回內文
+            df_old['content'] = content_store.get_many(df_old)
+
+        # 分群門檻調整過：用索引裡存好的指紋重新分群 (不需要內文)
+        if not needs_clusters and dedup_index.threshold != HAMMING_THRESHOLD:
+            print(f"🧬 分群門檻 {dedup_index.threshold} -> {HAMMING_THRESHOLD}，正在重新分群...")
+            changed = dedup_index.recluster()
+            df_old['cluster_id'] = df_old['link'].map(lambda link: dedup_index.cluster_of(make_doc_id(link)))
+            print(f"   🔁 {changed} 篇文章換了群組")
+            migrated = True
+
+        # 舊版 CSV 沒有 cluster_id：第一次執行時用歷史內文建立索引
+        if needs_clusters:
+            print("🧬 歷史資料尚未分群，正在建立近似重複索引...")
+            df_old = df_old.sort_values('date_str', kind='stable')
+            df_old['cluster_id'] = dedup_index.assign_dataframe(df_old)
+            migrated = True
+
+        # 還沒有詞頻表：第一次執行時用歷史資料建立
+        if needs_keywords:
+            print("📚 尚未建立詞頻表，正在以歷史資料建立...")
+            update_keyword_model(keyword_model, df_old)
+            migrated = True
+
+        df_old = df_old.drop(columns=['content'], errors='ignore')
     else:
         df_old = pd.DataFrame()
         last_date = "2025-11-01" # 設定你的資料起始日
@@ -43,10 +155,32 @@ def main():
 
     if not new_data:
         print("😴 目前是最新的，無需更新")
+        # 補資料或還沒有資料庫時，仍然要存檔
+        if not df_old.empty and (migrated or not os.path.exists(DB_FILE)):
+            save_archive(df_old, df_old, dedup_index, keyword_model)
         return
 
     # --- 4. 合併與存檔 ---
     df_new = pd.DataFrame(new_data)
+
+    # 重新以完整索引分群 (可補上同一天不同批次爬蟲之間的重複)
+    # 依時間排序，讓最早發布的那篇成為群組代表
+    df_new = df_new.sort_values('date_str', kind='stable').drop_duplicates(subset=['link'])
+
+    # 內文只在歸檔時讀一次：存進壓縮內文庫，並拿來分群與更新詞頻
+    df_new['content'] = fetch_contents(df_new)
+    saved = content_store.add_dataframe(df_new)
+    print(f"📦 已寫入 {saved} 篇內文到 {CONTENT_DIR}/")
+
+    df_new['cluster_id'] = dedup_index.assign_dataframe(df_new)
+
+    # 詞頻表只加入 CSV 裡還沒有的文章，避免重複計算
+    if not df_old.empty:
+        fresh_df = df_new[~df_new['link'].isin(df_old['link'])]
+    else:
+        fresh_df = df_new
+    update_keyword_model(keyword_model, fresh_df)
+    df_new = df_new.drop(columns=['content'])
     
     if not df_old.empty:
         df_final = pd.concat([df_old, df_new], ignore_index=True)
@@ -57,8 +191,9 @@ def main():
     df_final = df_final.drop_duplicates(subset=['link'])
     
     # 存檔
-    df_final.to_csv(CSV_FILE, index=False, encoding="utf-8-sig")
-    print(f"💾 已儲存至 {CSV_FILE}，目前總筆數: {len(df_final)}")
+    # 剛補上 cluster_id 的話，舊資料也要一起寫進資料庫
+    df_changed = df_final if migrated else df_new
+    save_archive(df_final, df_changed, dedup_index, keyword_model)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file